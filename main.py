@@ -1,59 +1,151 @@
-from scraper.donedeal_scraper import extract_listings
-from utils.driver_setup import setup_driver
+from scraper.donedeal_scraper import extract_listings, extract_listings_parallel, extract_listings_http
+from utils.driver_setup import setup_driver, setup_persistent_driver, close_saved_browser
 from utils.clean_listings import clean_listings
+from utils.ebay_comparison import analyze_profit_opportunities
 import pandas as pd
+import argparse
 import os
-import time
-import random
+import traceback
 
-def main():
-    driver = setup_driver()
-    keyword = "jordans"  # Change this to your desired search term
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape and clean DoneDeal listings")
+    parser.add_argument("-k", "--keywords", nargs="+", default=["jordans"],
+                        help="one or more search terms, scraped one after another (default: jordans)")
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="stop after this many result pages per keyword (default: no limit)")
+    parser.add_argument("--output-format", choices=["csv", "xlsx", "parquet"], default="parquet",
+                        help="file format for the raw listings (default: parquet)")
+    parser.add_argument("--debug", action="store_true",
+                        help="also save the raw listings as xlsx for inspecting by hand")
+    parser.add_argument("--clean", action=argparse.BooleanOptionalAction, default=True,
+                        help="filter and save cleaned listings (default: on)")
+    parser.add_argument("--profit-analysis", action="store_true",
+                        help="compare cleaned listings against eBay sold prices")
+    parser.add_argument("--fresh", action="store_true",
+                        help="close the browser left open by the last run and use a new one that closes afterwards")
+    parser.add_argument("--close-browser", action="store_true",
+                        help="close the browser left open by the last run and exit")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of browsers scraping pages in parallel (default: 1)")
+    parser.add_argument("--browser", action="store_true",
+                        help="scrape DoneDeal and eBay with Chrome instead of plain HTTP requests")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore pages and eBay searches cached by earlier runs and fetch everything again")
+    args = parser.parse_args()
+    if args.profit_analysis and not args.clean:
+        parser.error("--profit-analysis needs cleaning enabled (drop --no-clean)")
+    return args
+
+class SharedBrowser:
+    """Starts Chrome the first time it's needed and reuses it for every keyword"""
+
+    def __init__(self, fresh):
+        self.fresh = fresh
+        self.driver = None
+
+    def get(self):
+        if self.driver is None:
+            self.driver = setup_driver() if self.fresh else setup_persistent_driver()
+        return self.driver
+
+    def close(self):
+        # Close the driver, or leave it open so the next run can skip Chrome startup
+        if self.driver is not None and self.fresh:
+            self.driver.quit()
+        elif self.driver is not None:
+            print("🌐 Browser left open for the next run (use --fresh to start a new one, or --close-browser to close it)")
+
+def scrape_keyword(keyword, args, browser):
+    use_cache = not args.no_cache
+    listings = [] if args.browser else extract_listings_http(keyword, args.max_pages, use_cache=use_cache) # Runs the scraper
+
+    # Fall back to a real browser if the pages need JavaScript to render
+    if not listings:
+        if not args.browser:
+            print("🌐 Nothing found over plain HTTP — retrying with Chrome...")
+        if args.workers > 1:
+            listings = extract_listings_parallel(keyword, args.max_pages, workers=args.workers, use_cache=use_cache)
+        else:
+            listings = extract_listings(browser.get(), keyword, args.max_pages, use_cache=use_cache)
+    return listings
+
+def save_raw_listings(df, keyword, output_format):
+    raw_path = os.path.join("sheets", f"{keyword}_raw_listings.{output_format}")
+    if output_format == "csv":
+        df.to_csv(raw_path, index=False)
+    elif output_format == "parquet":
+        df.to_parquet(raw_path, index=False, compression="zstd")
+    else:
+        df.to_excel(raw_path, index=False)
+    print(f"✅ Saved {len(df)} raw listings to {raw_path}")
+
+def run_keyword(keyword, args, browser):
     print(f"🔍 Searching for '{keyword}' on DoneDeal...")
-    
+    listings = scrape_keyword(keyword, args, browser)
+    if not listings:
+        print("⚠️ No listings found.")
+        return
+
+    df = pd.DataFrame(listings)
+    os.makedirs("sheets", exist_ok=True)
+    save_raw_listings(df, keyword, args.output_format)
+    if args.debug and args.output_format != "xlsx":
+        save_raw_listings(df, keyword, "xlsx")
+    if not args.clean:
+        return
+
+    # Clean the data using the cleaning function
+    print(f"\n🧹 Cleaning listings for '{keyword}'...")
+    cleaned_df = clean_listings(df, keyword, f"{keyword}_cleaned_listings.xlsx")
+    if len(cleaned_df) == 0:
+        print("⚠️ No relevant listings found after cleaning.")
+        return
+
+    print(f"📊 Raw data columns: {list(df.columns)}")
+    print(f"🎯 Final result: {len(cleaned_df)} relevant listings found!")
+
+    # Show top 5 cheapest items
+    print(f"\n💰 Top 5 cheapest {keyword} listings:")
+    for i in range(min(5, len(cleaned_df))):
+        item = cleaned_df.iloc[i]
+        print(f"  {i+1}. {item['title']} - {item['price_formatted']} ({item['location']})")
+
+    if args.profit_analysis:
+        print()
+        # Hand over the getter so Chrome only starts if eBay has to be searched with it
+        analyze_profit_opportunities(cleaned_df, browser.get, f"{keyword}_profit_analysis.xlsx",
+                                     use_browser=args.browser, use_cache=not args.no_cache)
+
+def main():
+    args = parse_args()
+    if args.close_browser:
+        print("🛑 Closed the browser left open by the last run" if close_saved_browser() else "🌐 No browser left open")
+        return
+    # A fresh run doesn't reuse the saved browser, so don't leave it running in the background
+    if args.fresh and close_saved_browser():
+        print("🛑 Closed the browser left open by the last run")
+    browser = SharedBrowser(args.fresh)
+
     try:
-        listings = extract_listings(driver, keyword) # Runs the scraper
-        if listings:
-            df = pd.DataFrame(listings)
-            os.makedirs("sheets", exist_ok=True)
-            
-            # Save raw data
-            raw_excel_path = os.path.join("sheets", f"{keyword}_raw_listings.xlsx")
-            df.to_excel(raw_excel_path, index=False) # Saves the raw listings to an excel file
-            print(f"✅ Saved {len(listings)} raw listings to {raw_excel_path}")
-            
-            # Clean the data using the cleaning function
-            print(f"\n🧹 Cleaning listings for '{keyword}'...")
-            cleaned_df = clean_listings(df, keyword, f"{keyword}_cleaned_listings.xlsx")
-            
-            if len(cleaned_df) > 0:
-                print(f"📊 Raw data columns: {list(df.columns)}")
-                print(f"🎯 Final result: {len(cleaned_df)} relevant listings found!")
-                
-                # Show top 5 cheapest items
-                print(f"\n💰 Top 5 cheapest {keyword} listings:")
-                for i in range(min(5, len(cleaned_df))):
-                    item = cleaned_df.iloc[i]
-                    print(f"  {i+1}. {item['title']} - {item['price_formatted']} ({item['location']})")
-                    
-            else:
-                print("⚠️ No relevant listings found after cleaning.")
-                
-        else:
-            print("⚠️ No listings found.")
-            
-    except Exception as e:
-        print(f"❌ Error during scraping: {e}")
-        import traceback
-        traceback.print_exc()
-    
+        for keyword in args.keywords:
+            try:
+                run_keyword(keyword, args, browser)
+            except Exception as e:
+                print(f"❌ Error while processing '{keyword}': {e}")
+                traceback.print_exc()
+            print(f"\n✅ ProfitBot scraping complete for '{keyword}'!\n")
     finally:
-        # Close the driver
-        driver.quit()
-        print(f"\n✅ ProfitBot scraping complete for '{keyword}'!")
-        print(f"📁 Check the 'sheets' folder for:")
-        print(f"   • {keyword}_raw_listings.xlsx (all scraped data)")
-        print(f"   • {keyword}_cleaned_listings.xlsx (filtered & relevant only)")
+        browser.close()
+
+    print(f"📁 Check the 'sheets' folder for, per keyword:")
+    print(f"   • <keyword>_raw_listings.{args.output_format} (all scraped data)")
+    if args.debug and args.output_format != "xlsx":
+        print(f"   • <keyword>_raw_listings.xlsx (all scraped data, for debugging)")
+    if args.clean:
+        print(f"   • <keyword>_cleaned_listings.xlsx (filtered & relevant only)")
+        print(f"   • <keyword>_cleaned_listings.parquet (same cleaned data for reuse in code)")
+    if args.profit_analysis:
+        print(f"   • <keyword>_profit_analysis.xlsx (eBay price comparison)")
 
 if __name__ == "__main__":
     main()
@@ -1,72 +1,254 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+from lxml import html as lxml_html
+from utils.driver_setup import setup_driver, BROWSER_HEADERS
+from utils.page_cache import load_cached_page, save_page
+from utils.throttle import Throttle
+from functools import partial
+import aiohttp
+import asyncio
 import time
-import random
 
-def extract_listings(driver, keyword, max_pages=None):
+# Pulls every card on the page in one round-trip instead of 4+ WebDriver calls per listing.
+# Written as an expression so it can run through CDP Runtime.evaluate as well as execute_script.
+LISTINGS_JS = """
+Array.from(document.querySelectorAll("ul[data-testid='card-list'] li a")).map(a => {
+    const title = a.querySelector("p[class*='Title']");
+    const price = a.querySelector("div[class*='Price']");
+    const meta = a.querySelectorAll("li[class*='MetaInfoItem']");
+    return {
+        title: title ? title.innerText : "N/A",
+        price: price ? price.innerText : "N/A",
+        location: meta.length > 1 ? meta[1].innerText : "N/A",
+        url: a.getAttribute("href")
+    };
+})
+"""
+
+PAGE_SIZE = 30
+
+def build_search_url(keyword):
+    keyword_encoded = keyword.replace(" ", "+")
+    return f"https://www.donedeal.ie/all?words={keyword_encoded}"
+
+def build_page_url(base_url, page_num):
+    start = page_num * PAGE_SIZE
+    return f"{base_url}&start={start}" if start > 0 else base_url
+
+def _full_link(link):
+    return f"https://www.donedeal.ie{link}" if link and link.startswith("/") else link or "N/A"
+
+def _run_listings_js(driver):
+    """Evaluate LISTINGS_JS in the page, straight over CDP when the driver supports it"""
+    if hasattr(driver, "execute_cdp_cmd"):
+        response = driver.execute_cdp_cmd("Runtime.evaluate", {
+            "expression": LISTINGS_JS,
+            "returnByValue": True,
+            "awaitPromise": False
+        })
+        if "exceptionDetails" not in response:
+            return response.get("result", {}).get("value") or []
+    # Drivers without CDP (e.g. other browsers) evaluate it as a normal script
+    return driver.execute_script(f"return {LISTINGS_JS.strip()}") or []
+
+def scrape_page(driver, page_url, use_cache=True):
+    """Load one results page and return its listings, or None if it never loaded"""
+    driver.get(page_url)
+
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "ul[data-testid='card-list']"))
+        )
+    except TimeoutException:
+        print("⏰ Timeout on page load.")
+        return None
+
+    if use_cache:
+        save_page(page_url, driver.page_source)
+
+    page_listings = []
+    for listing in _run_listings_js(driver):
+        page_listings.append({
+            "title": listing["title"],
+            "price": listing["price"],
+            "location": listing["location"],
+            "url": _full_link(listing.get("url"))
+        })
+    return page_listings
+
+def load_page_listings(driver, page_url, use_cache=True, throttle=None):
+    """Return one page's listings, parsing a fresh cached copy when there is one"""
+    cached_html = load_cached_page(page_url) if use_cache else None
+    if cached_html is not None:
+        return parse_listings_html(cached_html)
+
+    # Only real page loads count towards the throttle
+    if throttle is not None:
+        throttle.wait()
+    started = time.monotonic()
+    page_listings = scrape_page(driver, page_url, use_cache)
+    if throttle is not None:
+        throttle.record(time.monotonic() - started)
+    return page_listings
+
+def merge_new_listings(listings, seen_urls, page_listings):
+    """Append listings with unseen URLs and return how many were added"""
+    new_listings = 0
+    for listing in page_listings:
+        if listing["url"] not in seen_urls:
+            listings.append(listing)
+            seen_urls.add(listing["url"])
+            new_listings += 1
+    return new_listings
+
+def extract_listings(driver, keyword, max_pages=None, use_cache=True):
     listings = []
     seen_urls = set()
     page_num = 0
-    keyword_encoded = keyword.replace(" ", "+")
-    base_url = f"https://www.donedeal.ie/all?words={keyword_encoded}"
+    base_url = build_search_url(keyword)
+    throttle = Throttle()
     while True:
         if max_pages is not None and page_num >= max_pages:
             print("📦 Reached max page limit.")
             break
-        start = page_num * 30
-        page_url = f"{base_url}&start={start}" if start > 0 else base_url
+        page_url = build_page_url(base_url, page_num)
         print(f"📄 Scraping page {page_num + 1} → {page_url}")
-        driver.get(page_url)
 
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "ul[data-testid='card-list']"))
-            )
-        except TimeoutException:
-            print("⏰ Timeout on page load.")
+        page_listings = load_page_listings(driver, page_url, use_cache, throttle)
+        if page_listings is None:
             break
-        
-        listing_elements = driver.find_elements(By.CSS_SELECTOR, "ul[data-testid='card-list'] li a")
-        if not listing_elements:
+        if not page_listings:
             print("⚠️ No listings found — stopping.")
             break
 
-        new_listings = 0
+        if merge_new_listings(listings, seen_urls, page_listings) == 0:
+            print("✅ No new listings found — assumed last page.")
+            break
 
-        for element in listing_elements:
-            try:
-                title = element.find_element(By.CSS_SELECTOR, "p[class*='Title']").text
-            except NoSuchElementException:
-                title = "N/A"
+        page_num += 1
 
-            try:
-                price = element.find_element(By.CSS_SELECTOR, "div[class*='Price']").text
-            except NoSuchElementException:
-                price = "N/A"
+    return listings
 
-            meta_items = element.find_elements(By.CSS_SELECTOR, "li[class*='MetaInfoItem']")
-            location = meta_items[1].text if len(meta_items) > 1 else "N/A"
+# Each pool worker process owns one browser (and its throttle) for its whole lifetime
+_worker_driver = None
+_worker_throttle = None
 
-            link = element.get_attribute("href")
-            full_link = f"https://www.donedeal.ie{link}" if link and link.startswith("/") else link or "N/A"
+def _init_worker():
+    global _worker_driver, _worker_throttle
+    _worker_driver = setup_driver()
+    _worker_throttle = Throttle()
+    # Runs when the worker exits after pool.close()/join()
+    Finalize(None, _worker_driver.quit, exitpriority=16)
 
-            if full_link not in seen_urls:
-                listings.append({
-                    "title": title,
-                    "price": price,
-                    "location": location,
-                    "url": full_link
-                })
-                seen_urls.add(full_link)
-                new_listings += 1
+def _scrape_page_in_worker(page_url, use_cache=True):
+    return load_page_listings(_worker_driver, page_url, use_cache, _worker_throttle)
 
-        if new_listings == 0:
-            print("✅ No new listings found — assumed last page.")
-            break
+def extract_listings_parallel(keyword, max_pages=None, workers=4, use_cache=True):
+    """Scrape result pages with a pool of browsers, each fetching a different page"""
+    listings = []
+    seen_urls = set()
+    page_num = 0
+    base_url = build_search_url(keyword)
+    pool = Pool(workers, initializer=_init_worker)
+    try:
+        while max_pages is None or page_num < max_pages:
+            batch_end = page_num + workers if max_pages is None else min(page_num + workers, max_pages)
+            page_urls = [build_page_url(base_url, n) for n in range(page_num, batch_end)]
+            print(f"📄 Scraping pages {page_num + 1}-{batch_end} with {workers} browsers")
 
-        page_num += 1
-        time.sleep(random.uniform(1, 2))
+            finished = False
+            for page_listings in pool.map(partial(_scrape_page_in_worker, use_cache=use_cache), page_urls):
+                if not page_listings or merge_new_listings(listings, seen_urls, page_listings) == 0:
+                    finished = True
+                    break
+            if finished:
+                print("✅ No new listings found — assumed last page.")
+                break
+            page_num = batch_end
+        else:
+            print("📦 Reached max page limit.")
+    finally:
+        pool.close()
+        pool.join()
+
+    return listings
+
+def parse_listings_html(page_html):
+    """Extract listings from a results page's HTML without a browser"""
+    page_listings = []
+    for card in lxml_html.fromstring(page_html).cssselect("ul[data-testid='card-list'] li a"):
+        title = card.cssselect("p[class*='Title']")
+        price = card.cssselect("div[class*='Price']")
+        meta = card.cssselect("li[class*='MetaInfoItem']")
+        page_listings.append({
+            "title": title[0].text_content().strip() if title else "N/A",
+            "price": price[0].text_content().strip() if price else "N/A",
+            "location": meta[1].text_content().strip() if len(meta) > 1 else "N/A",
+            "url": _full_link(card.get("href"))
+        })
+    return page_listings
+
+async def _fetch_page(session, semaphore, page_url, use_cache=True):
+    """Listings on one result page, or [] if it couldn't be fetched or had no cards"""
+    if use_cache:
+        cached_html = load_cached_page(page_url)
+        if cached_html is not None:
+            return parse_listings_html(cached_html)
+
+    async with semaphore:
+        print(f"📄 Fetching {page_url}")
+        try:
+            async with session.get(page_url) as response:
+                if response.status != 200:
+                    print(f"⚠️ HTTP {response.status} for {page_url}")
+                    return []
+                page_html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Error fetching {page_url}: {e}")
+            return []
+
+    if not page_html.strip():
+        return []
+    page_listings = parse_listings_html(page_html)
+    # Only cache pages that actually had cards, so a JS-gated page can't poison the browser fallback
+    if use_cache and page_listings:
+        save_page(page_url, page_html)
+    return page_listings
+
+async def extract_listings_async(keyword, max_pages=None, concurrency=8, use_cache=True):
+    """Fetch result pages concurrently over plain HTTP and parse them with lxml"""
+    listings = []
+    seen_urls = set()
+    page_num = 0
+    base_url = build_search_url(keyword)
+    semaphore = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=20)
+    async with aiohttp.ClientSession(headers=BROWSER_HEADERS, timeout=timeout) as session:
+        while max_pages is None or page_num < max_pages:
+            batch_end = page_num + concurrency if max_pages is None else min(page_num + concurrency, max_pages)
+            pages = await asyncio.gather(*[
+                _fetch_page(session, semaphore, build_page_url(base_url, n), use_cache)
+                for n in range(page_num, batch_end)
+            ])
+
+            finished = False
+            for page_listings in pages:
+                if not page_listings or merge_new_listings(listings, seen_urls, page_listings) == 0:
+                    finished = True
+                    break
+            if finished:
+                print("✅ No new listings found — assumed last page.")
+                break
+            page_num = batch_end
+        else:
+            print("📦 Reached max page limit.")
 
     return listings
+
+def extract_listings_http(keyword, max_pages=None, concurrency=8, use_cache=True):
+    """Synchronous wrapper around extract_listings_async"""
+    return asyncio.run(extract_listings_async(keyword, max_pages, concurrency, use_cache))
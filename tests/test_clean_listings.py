@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from utils.clean_listings import (clean_listings, clean_price, clean_prices, get_exclusion_patterns,
+                                  is_relevant_listing, relevant_listings_mask, remove_duplicates)
+
+def test_clean_prices_matches_clean_price():
+    prices = pd.Series(["€1,250", "£30", "$99.99", "No price", "€ 45 ONO", "", "1 000"])
+    expected = [clean_price(p) for p in prices]
+
+    result = clean_prices(prices)
+
+    for value, wanted in zip(result, expected):
+        if wanted is None:
+            assert pd.isna(value)
+        else:
+            assert value == wanted
+
+def test_relevant_listings_mask_matches_is_relevant_listing():
+    titles = pd.Series(["iPhone 13 Pro", "iPhone 12 case", "BMW with iphone holder",
+                        "iPad and iPhone", "Samsung S21", "IPHONE 11 64GB", ""])
+    patterns = get_exclusion_patterns()
+    expected = [is_relevant_listing(t, "iphone", patterns) for t in titles]
+
+    assert relevant_listings_mask(titles, "iphone", patterns).tolist() == expected
+    assert relevant_listings_mask(titles, "iphone").tolist() == expected
+
+def test_clean_listings_writes_excel_and_parquet(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = pd.DataFrame({
+        "title": ["iPhone 13", "iPhone 12 case", "iPhone 11"],
+        "price": ["€400", "€10", "No price"],
+        "location": ["Dublin", "Cork", "Galway"],
+        "url": ["https://www.donedeal.ie/1", "https://www.donedeal.ie/2", "https://www.donedeal.ie/3"]
+    })
+
+    cleaned = clean_listings(df, "iphone", "iphone_cleaned_listings.xlsx")
+
+    assert cleaned["title"].tolist() == ["iPhone 13"]
+    assert (tmp_path / "sheets" / "iphone_cleaned_listings.xlsx").exists()
+    reloaded = pd.read_parquet(tmp_path / "sheets" / "iphone_cleaned_listings.parquet")
+    assert reloaded["numeric_price"].tolist() == [400.0]
+
+def test_remove_duplicates_by_url_then_title():
+    df = pd.DataFrame({
+        "title": ["iPhone 13", "iPhone 13", "IPHONE 13 ", "iPhone 12"],
+        "url": ["https://www.donedeal.ie/1", "https://www.donedeal.ie/1", "https://www.donedeal.ie/2", "https://www.donedeal.ie/3"]
+    })
+
+    result = remove_duplicates(df)
+
+    assert result.index.tolist() == [0, 3]
+    assert list(result.columns) == ["title", "url"]
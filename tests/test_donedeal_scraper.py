@@ -3,7 +3,9 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import pytest
-from scraper.donedeal_scraper import extract_listings
+import asyncio
+from scraper import donedeal_scraper
+from scraper.donedeal_scraper import extract_listings, parse_listings_html
 from selenium.webdriver.chrome.webdriver import WebDriver
 from utils.driver_setup import setup_driver
 
@@ -19,3 +21,60 @@ def test_extract_listings_runs_quickly():
         assert required_keys.issubset(listings[0].keys())
 
     driver.quit()
+
+def test_parse_listings_html_reads_cards():
+    page_html = """
+    <ul data-testid="card-list">
+      <li><a href="/phones-for-sale/iphone-13/123">
+        <p class="Card__Title">iPhone 13 128GB</p>
+        <div class="Card__Price">€450</div>
+        <ul><li class="Card__MetaInfoItem">2 days</li><li class="Card__MetaInfoItem">Dublin</li></ul>
+      </a></li>
+      <li><a href="https://www.donedeal.ie/x/456"><p class="Card__Title">No price</p></a></li>
+    </ul>
+    """
+    listings = parse_listings_html(page_html)
+
+    assert listings[0] == {
+        "title": "iPhone 13 128GB",
+        "price": "€450",
+        "location": "Dublin",
+        "url": "https://www.donedeal.ie/phones-for-sale/iphone-13/123"
+    }
+    assert listings[1]["price"] == "N/A"
+    assert listings[1]["location"] == "N/A"
+    assert listings[1]["url"] == "https://www.donedeal.ie/x/456"
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class FakeSession:
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url):
+        return FakeResponse(self.body)
+
+def test_fetch_page_does_not_cache_pages_without_cards(monkeypatch):
+    saved = []
+    monkeypatch.setattr(donedeal_scraper, "load_cached_page", lambda url: None)
+    monkeypatch.setattr(donedeal_scraper, "save_page", lambda url, html: saved.append(url))
+    # A JavaScript-gated page that only mentions the card list in its bundle
+    page_html = '<html><script>render({"testid": "card-list"})</script></html>'
+
+    listings = asyncio.run(donedeal_scraper._fetch_page(FakeSession(page_html), asyncio.Semaphore(1), "https://www.donedeal.ie/x"))
+
+    assert listings == []
+    assert saved == []
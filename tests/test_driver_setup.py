@@ -1,11 +1,77 @@
 import sys
 import os
+import json
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.driver_setup import setup_driver
+from utils import driver_setup
+from utils.driver_setup import setup_driver, setup_persistent_driver, quit_persistent_driver
 from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 
 def test_driver_starts_and_quits():
     driver: WebDriver = setup_driver()
     assert isinstance(driver, WebDriver)
     driver.quit()
+
+def test_persistent_driver_reattaches(tmp_path, monkeypatch):
+    monkeypatch.setattr(driver_setup, "SESSION_FILE", str(tmp_path / "session.json"))
+    driver = setup_persistent_driver()
+    reattached = setup_persistent_driver()
+    assert reattached.session_id == driver.session_id
+    quit_persistent_driver(reattached)
+    assert not os.path.exists(driver_setup.SESSION_FILE)
+
+class FakeProcess:
+    pid = 4321
+
+def test_persistent_driver_saves_session_offline(tmp_path, monkeypatch):
+    session_file = tmp_path / "session.json"
+    started, stopped = [], []
+    monkeypatch.setattr(driver_setup, "SESSION_FILE", str(session_file))
+    monkeypatch.setattr(driver_setup, "free_port", lambda: 9515)
+    monkeypatch.setattr(driver_setup, "is_connectable", lambda port: True)
+    monkeypatch.setattr(driver_setup, "ChromeDriverManager", lambda: type("Manager", (), {"install": lambda self: "chromedriver"})())
+    monkeypatch.setattr(driver_setup.subprocess, "Popen", lambda *args, **kwargs: started.append(args) or FakeProcess())
+    monkeypatch.setattr(driver_setup, "_stop_chromedriver", stopped.append)
+
+    def fake_start_session(self, capabilities):
+        self.session_id = "new-session"
+    monkeypatch.setattr(RemoteWebDriver, "start_session", fake_start_session)
+    monkeypatch.setattr(RemoteWebDriver, "execute", lambda self, command, params=None: {"value": None})
+
+    driver = setup_persistent_driver()
+    assert json.loads(session_file.read_text()) == {
+        "session_id": "new-session", "url": "http://localhost:9515", "pid": 4321
+    }
+
+    reattached = setup_persistent_driver()
+    assert reattached.session_id == driver.session_id
+    assert len(started) == 1  # Reattaching doesn't start another chromedriver
+
+    quit_persistent_driver(reattached)
+    assert stopped == [4321]
+    assert not session_file.exists()
+
+def test_persistent_driver_runs_cdp_commands(monkeypatch):
+    commands = []
+    monkeypatch.setattr(RemoteWebDriver, "execute",
+                        lambda self, command, params=None: commands.append((command, params)) or {"value": {"result": {}}})
+
+    driver = driver_setup.PersistentWebdriver(command_executor="http://localhost:9515", session_id="saved-session")
+
+    assert driver.execute_cdp_cmd("Runtime.evaluate", {"expression": "1"}) == {"result": {}}
+    assert commands[-1] == ("executeCdpCommand", {"cmd": "Runtime.evaluate", "params": {"expression": "1"}})
+
+def test_close_saved_browser_stops_chromedriver(tmp_path, monkeypatch):
+    session_file = tmp_path / "session.json"
+    session_file.write_text(json.dumps({"session_id": "old-session", "url": "http://localhost:9515", "pid": 4321}))
+    stopped = []
+    monkeypatch.setattr(driver_setup, "SESSION_FILE", str(session_file))
+    monkeypatch.setattr(driver_setup, "is_connectable", lambda port: True)
+    monkeypatch.setattr(driver_setup, "_stop_chromedriver", stopped.append)
+    monkeypatch.setattr(RemoteWebDriver, "execute", lambda self, command, params=None: {"value": None})
+
+    assert driver_setup.close_saved_browser()
+    assert stopped == [4321]
+    assert not session_file.exists()
+    assert not driver_setup.close_saved_browser()  # Nothing left to close
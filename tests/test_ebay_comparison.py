@@ -0,0 +1,145 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import pandas as pd
+import pytest
+from lxml import html as lxml_html
+from utils import ebay_comparison
+from utils.ebay_comparison import EbayScraper, normalize_product_name, _analyze_item, analyze_profit_opportunities
+
+SOLD_ITEMS_HTML = """
+<ul class="srp-results">
+  <li class="s-item">
+    <div class="s-item__title">Apple iPhone 13 128GB</div>
+    <span class="s-item__price">£350.00</span>
+    <span class="s-item__title--tag">Sold 3 Jun 2025</span>
+    <span class="SECONDARY_INFO">Pre-owned</span>
+  </li>
+  <li class="s-item">
+    <div class="s-item__subtitle">Sponsored</div>
+    <div class="s-item__title">iPhone 13 case</div>
+    <span class="s-item__price">£5.00</span>
+  </li>
+  <li class="s-item">
+    <div class="s-item__title">iPhone 13 Pro</div>
+    <span class="s-item__price">£400.00 to £450.00</span>
+  </li>
+</ul>
+"""
+
+def test_extract_node_data_from_html():
+    scraper = EbayScraper()
+    nodes = list(scraper._organic_nodes(lxml_html.fromstring(SOLD_ITEMS_HTML)))
+
+    items = [scraper._extract_node_data(node, "co.uk", "£") for node in nodes]
+
+    assert items[0] == {
+        'title': 'Apple iPhone 13 128GB',
+        'price': 350.0,
+        'price_text': '£350.00',
+        'domain': 'co.uk',
+        'sale_date': 'Sold 3 Jun 2025',
+        'condition': 'Pre-owned',
+        'currency': '£'
+    }
+    assert len(items) == 2  # The sponsored card is skipped
+    assert items[1]['price'] == 400.0
+    assert items[1]['sale_date'] == "Recently sold"
+    assert items[1]['condition'] == "Not specified"
+
+def test_normalize_product_name_strips_whole_noise_words():
+    assert normalize_product_name("Nintendo Switch OLED White BRAND NEW boxed") == "nintendo switch oled"
+    assert normalize_product_name("Renewed Samsung S21 black") == "renewed samsung s21"
+
+def test_clean_price_reads_first_number():
+    scraper = EbayScraper()
+
+    assert scraper._clean_price("£1,234.50") == 1234.5
+    assert scraper._clean_price("£400.00 to £450.00") == 400.0
+    assert scraper._clean_price("EUR 5.5.5") == 5.5
+    assert scraper._clean_price("See price") is None
+
+def test_analyze_item_converts_ebay_prices_to_eur():
+    item = {
+        'representative_title': 'iPhone 13', 'search_term': 'iphone 13',
+        'avg_donedeal_price': 100.0, 'min_donedeal_price': 90.0, 'max_donedeal_price': 110.0,
+        'listing_count': 2, 'location': 'Dublin', 'url': 'https://www.donedeal.ie/x'
+    }
+    sold_listings = [{'price': 100.0, 'currency': '£'}, {'price': 200.0, 'currency': '$'}]
+
+    result = _analyze_item(item, sold_listings)
+
+    assert result['ebay_min_price_eur'] == 115.0
+    assert result['ebay_max_price_eur'] == 170.0
+    assert result['ebay_avg_price_eur'] == 142.5
+    assert result['profit_percentage'] == 42.5
+
+def test_browser_only_starts_when_http_fails(monkeypatch):
+    started = []
+    scraper = EbayScraper(driver=lambda: started.append(True))
+    monkeypatch.setattr(ebay_comparison, "load_cached_json", lambda key: None)
+    monkeypatch.setattr(ebay_comparison, "save_json", lambda key, value: None)
+
+    async def fake_http_search(session, search_term, domain, max_results):
+        return [{'title': 'iPhone 13', 'price': 350.0}]
+    monkeypatch.setattr(scraper, "_scrape_domain_async", fake_http_search)
+
+    results = asyncio.run(scraper._search_domain(None, "iphone 13", "co.uk", 10))
+
+    assert results == [{'title': 'iPhone 13', 'price': 350.0}]
+    assert started == []
+
+def test_search_domain_skips_cache_when_disabled(monkeypatch):
+    scraper = EbayScraper(use_cache=False)
+    monkeypatch.setattr(ebay_comparison, "load_cached_json", lambda key: [{'title': 'stale', 'price': 1.0}])
+    monkeypatch.setattr(ebay_comparison, "save_json", lambda key, value: pytest.fail("cache written"))
+
+    async def fake_http_search(session, search_term, domain, max_results):
+        return [{'title': 'fresh', 'price': 2.0}]
+    monkeypatch.setattr(scraper, "_scrape_domain_async", fake_http_search)
+
+    assert asyncio.run(scraper._search_domain(None, "iphone 13", "co.uk", 10)) == [{'title': 'fresh', 'price': 2.0}]
+
+def test_profit_analysis_with_no_products(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("sheets")
+    # Titles made only of noise words normalize to nothing, so there is nothing to search for
+    listings = pd.DataFrame({
+        'title': ['Brand new', 'Used'], 'numeric_price': [10.0, 20.0],
+        'location': ['Dublin', 'Cork'], 'url': ['https://www.donedeal.ie/a', 'https://www.donedeal.ie/b']
+    })
+
+    results = analyze_profit_opportunities(listings, None, "profit_analysis.xlsx")
+
+    assert len(results) == 0
+    assert 'profit_percentage' in results.columns
+    assert os.path.exists(os.path.join("sheets", "profit_analysis.xlsx"))
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class FakeSession:
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url):
+        return FakeResponse(self.body)
+
+def test_empty_ebay_page_falls_back_instead_of_raising():
+    scraper = EbayScraper()
+
+    assert asyncio.run(scraper._scrape_domain_async(FakeSession(""), "iphone 13", "co.uk", 10)) is None
@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.throttle import Throttle, DomainRateLimiter
+
+def test_throttle_delay_follows_response_time():
+    throttle = Throttle(min_delay=0.5, max_delay=5.0, backoff=1.0, smoothing=0.5)
+
+    throttle.record(2.0)
+    assert throttle.delay == 2.0
+
+    throttle.record(0.1)
+    assert throttle.delay == 1.05
+
+    for _ in range(20):
+        throttle.record(0.01)
+    assert throttle.delay == 0.5
+
+    throttle.record(60.0)
+    assert throttle.delay == 5.0
+
+def test_throttle_does_not_wait_before_first_request():
+    throttle = Throttle(min_delay=10.0)
+    throttle.wait()  # Would hang for 10 s if it slept
+
+def test_rate_limiter_spaces_requests_per_domain():
+    limiter = DomainRateLimiter(rate=1, interval=10.0)
+
+    assert limiter.reserve("ebay.co.uk") == 0
+    assert limiter.reserve("ebay.com") == 0  # Other domains aren't held up
+    assert 9.9 < limiter.reserve("ebay.co.uk") <= 10.0
+    assert 19.9 < limiter.reserve("ebay.co.uk") <= 20.0
@@ -1,45 +1,73 @@
 import pandas as pd
+import xlsxwriter
 import os
 import re
+import string
 from datetime import datetime
 
+# Currency symbols, thousands separators and letters dropped from a price in one pass
+_PRICE_TRANS = str.maketrans('', '', '€$£,' + string.ascii_letters)
+
 def clean_price(price_str):
     """Extract numeric price from price string"""
     try:
         # Remove common currency symbols and text
-        price_clean = re.sub(r'[€$£,]', '', str(price_str))
-        price_clean = re.sub(r'[a-zA-Z]', '', price_clean).strip()
+        price_clean = str(price_str).translate(_PRICE_TRANS).strip()
         return float(price_clean) if price_clean else None
     except (AttributeError, ValueError):
         return None
 
+def clean_prices(prices):
+    """Vectorized clean_price for a whole Series of price strings"""
+    price_clean = (prices.astype(str)
+                   .str.translate(_PRICE_TRANS)
+                   .str.strip())
+    return pd.to_numeric(price_clean, errors='coerce')
+
 def get_exclusion_patterns():
     """Return common patterns for irrelevant listings"""
     return [
         # Vehicles
-        r'\b(car|bmw|mercedes|audi|volkswagen|ford|toyota|honda|nissan|hyundai|kia|mazda|volvo|peugeot|renault|citroen|opel|skoda|seat|fiat|alfa romeo|porsche|ferrari|lamborghini|bentley|rolls royce)\b',
-        r'\b(suv|sedan|hatchback|estate|coupe|convertible|diesel|petrol|hybrid|electric)\b',
-        r'\b(automatic|manual|transmission|engine|mot|nct|tax|mileage|km|miles)\b',
+        r'\b(?:car|bmw|mercedes|audi|volkswagen|ford|toyota|honda|nissan|hyundai|kia|mazda|volvo|peugeot|renault|citroen|opel|skoda|seat|fiat|alfa romeo|porsche|ferrari|lamborghini|bentley|rolls royce)\b',
+        r'\b(?:suv|sedan|hatchback|estate|coupe|convertible|diesel|petrol|hybrid|electric)\b',
+        r'\b(?:automatic|manual|transmission|engine|mot|nct|tax|mileage|km|miles)\b',
         
         # Cases and Accessories (general)
         r'\bcase\b|\bcover\b|\bscreen protector\b|\bcharger\b|\bcable\b|\bstand\b|\bholder\b',
         r'\bheadphones\b|\bearphones\b|\bspeaker\b|\bpower bank\b|\badapter\b',
         
         # Other Electronics (when not the main search term)
-        r'\b(ipad|tablet|macbook|laptop|computer|tv|television|monitor|camera|drone)\b',
+        r'\b(?:ipad|tablet|macbook|laptop|computer|tv|television|monitor|camera|drone)\b',
         
         # Real Estate
-        r'\b(house|apartment|flat|room|property|rent|lease|mortgage)\b',
+        r'\b(?:house|apartment|flat|room|property|rent|lease|mortgage)\b',
         
         # Jobs/Services
-        r'\b(job|work|service|repair|installation|delivery)\b',
+        r'\b(?:job|work|service|repair|installation|delivery)\b',
         
         # Animals/Pets
-        r'\b(dog|cat|horse|puppy|kitten|pet|animal)\b'
+        r'\b(?:dog|cat|horse|puppy|kitten|pet|animal)\b'
     ]
 
-def is_relevant_listing(title, search_keyword, exclusion_patterns):
-    """Check if a listing is relevant based on search keyword and exclusion patterns"""
+# Extra exclusions for iPhone searches: cases, iPads, and accessories
+IPHONE_EXCLUSION_PATTERNS = [
+    r'\bcase\b|\bcover\b|\bscreen protector\b',
+    r'\bipad\b|\btablet\b',
+    r'\bcharger\b|\bcable\b|\badapter\b',
+    r'\bheadphones\b|\bearphones\b'
+]
+
+def _compile_union(patterns):
+    """Combine patterns into one case-insensitive regex so a title is scanned once"""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+_EXCLUSIONS = [re.compile(p, re.IGNORECASE) for p in get_exclusion_patterns()]
+_IPHONE_EXCLUSIONS = [re.compile(p, re.IGNORECASE) for p in IPHONE_EXCLUSION_PATTERNS]
+_EXCLUSION_RE = _compile_union(get_exclusion_patterns())
+_IPHONE_EXCLUSION_RE = _compile_union(get_exclusion_patterns() + IPHONE_EXCLUSION_PATTERNS)
+
+def is_relevant_listing(title, search_keyword, exclusion_patterns=None):
+    """Check if a listing is relevant based on search keyword and exclusion patterns (defaults to get_exclusion_patterns())"""
     if not title or not search_keyword:
         return False
     
@@ -51,46 +79,61 @@ def is_relevant_listing(title, search_keyword, exclusion_patterns):
         return False
     
     # Check against exclusion patterns
-    for pattern in exclusion_patterns:
-        if re.search(pattern, title_lower, re.IGNORECASE):
+    if exclusion_patterns is None:
+        exclusions = _EXCLUSIONS
+    else:
+        exclusions = [re.compile(p, re.IGNORECASE) for p in exclusion_patterns]
+    for pattern in exclusions:
+        if pattern.search(title_lower):
             return False
     
     # Special filtering based on search keyword
     if keyword_lower == 'iphone':
         # For iPhone searches, exclude cases, iPads, and accessories
-        iphone_exclusions = [
-            r'\bcase\b|\bcover\b|\bscreen protector\b',
-            r'\bipad\b|\btablet\b',
-            r'\bcharger\b|\bcable\b|\badapter\b',
-            r'\bheadphones\b|\bearphones\b'
-        ]
-        for pattern in iphone_exclusions:
-            if re.search(pattern, title_lower, re.IGNORECASE):
+        for pattern in _IPHONE_EXCLUSIONS:
+            if pattern.search(title_lower):
                 return False
     
     return True
 
+def relevant_listings_mask(titles, search_keyword, exclusion_patterns=None):
+    """Vectorized is_relevant_listing: one regex scan over the whole Series of titles"""
+    if not search_keyword:
+        return pd.Series(False, index=titles.index)
+    
+    # Must contain the search keyword
+    mask = titles.str.contains(search_keyword, case=False, regex=False, na=False)
+    
+    is_iphone = search_keyword.lower() == 'iphone'
+    if exclusion_patterns is None:
+        exclude_re = _IPHONE_EXCLUSION_RE if is_iphone else _EXCLUSION_RE
+    else:
+        patterns = list(exclusion_patterns) + (IPHONE_EXCLUSION_PATTERNS if is_iphone else [])
+        exclude_re = _compile_union(patterns) if patterns else None
+    if exclude_re is not None:
+        mask &= ~titles.str.contains(exclude_re, na=False)
+    
+    return mask
+
 def remove_duplicates(df):
     """Remove duplicate listings based on title similarity and URL"""
     if len(df) == 0:
         return df
     
     # Remove exact duplicates
-    df = df.drop_duplicates(subset=['url'], keep='first')
-    
-    # Remove near-duplicate titles (same title with minor variations)
-    df['title_clean'] = df['title'].str.lower().str.strip()
-    df = df.drop_duplicates(subset=['title_clean'], keep='first')
-    df = df.drop('title_clean', axis=1)
+    df = df[~df['url'].duplicated(keep='first')]
     
-    return df
+    # Remove near-duplicate titles (same title with minor variations), keyed on a
+    # normalized Series rather than a temporary column that has to be added and dropped
+    title_key = df['title'].str.lower().str.strip()
+    return df[~title_key.duplicated(keep='first')]
 
 def clean_listings(data, search_keyword, output_filename=None):
     """
     Clean and filter listings based on search keyword
     
     Args:
-        data: DataFrame or path to Excel/CSV file
+        data: DataFrame or path to Excel/CSV/Parquet file
         search_keyword: The keyword that was searched for
         output_filename: Optional filename to save cleaned data
     
@@ -103,11 +146,13 @@ def clean_listings(data, search_keyword, output_filename=None):
             df = pd.read_excel(data)
         elif data.endswith('.csv'):
             df = pd.read_csv(data)
+        elif data.endswith('.parquet'):
+            df = pd.read_parquet(data)
         else:
-            raise ValueError("Unsupported file format. Use .xlsx or .csv")
+            raise ValueError("Unsupported file format. Use .xlsx, .csv or .parquet")
         print(f"📊 Loaded {len(df)} total listings from {data}")
     else:
-        df = data.copy()
+        df = data
         print(f"📊 Processing {len(df)} total listings")
     
     # Validate required columns
@@ -115,45 +160,38 @@ def clean_listings(data, search_keyword, output_filename=None):
     missing_columns = [col for col in required_columns if col not in df.columns]
     if missing_columns:
         print(f"⚠️  Warning: Missing columns: {missing_columns}")
-        return df
+        return df.copy()
     
-    # Basic cleanup - handle missing values and clean strings
-    for col in required_columns:
-        df[col] = df[col].fillna("").astype(str).str.strip()
+    # Basic cleanup - handle missing values and clean strings (assign returns a new frame, so the input is untouched)
+    df = df.assign(**{col: df[col].fillna("").astype(str).str.strip() for col in required_columns})
     
-    # Remove empty titles
-    df = df[df['title'] != ""]
-    print(f"📝 After removing empty titles: {len(df)} listings")
+    # Build every row filter up front, then filter the frame once
+    title_mask = df['title'] != ""
+    print(f"📝 After removing empty titles: {title_mask.sum()} listings")
     
-    # Filter for relevant listings
-    exclusion_patterns = get_exclusion_patterns()
-    relevant_mask = df['title'].apply(
-        lambda title: is_relevant_listing(title, search_keyword, exclusion_patterns)
-    )
-    df = df[relevant_mask]
-    print(f"🎯 After relevance filtering: {len(df)} listings")
+    relevant_mask = title_mask & relevant_listings_mask(df['title'], search_keyword)
+    print(f"🎯 After relevance filtering: {relevant_mask.sum()} listings")
+    
+    numeric_price = clean_prices(df["price"])
+    keep_mask = relevant_mask & numeric_price.notna() & (numeric_price > 0)
+    print(f"💰 Listings with valid prices: {keep_mask.sum()}")
+    
+    df = df.loc[keep_mask].assign(numeric_price=numeric_price[keep_mask])
     
     # Remove duplicates
     df = remove_duplicates(df)
     print(f"🔄 After duplicate removal: {len(df)} listings")
     
-    # Clean and validate prices
-    df["numeric_price"] = df["price"].apply(clean_price)
-    valid_price_mask = df["numeric_price"].notna() & (df["numeric_price"] > 0)
-    df = df[valid_price_mask]
-    print(f"💰 Listings with valid prices: {len(df)}")
-    
     if len(df) == 0:
         print("⚠️  No valid listings found after cleaning")
         return df
     
-    # Sort by price (ascending - cheapest first)
-    df = df.sort_values(by="numeric_price", ascending=True)
-    
-    # Add helpful columns
-    df["price_formatted"] = df["numeric_price"].apply(lambda x: f"€{x:,.2f}")
-    df["scraped_date"] = datetime.now().strftime("%Y-%m-%d %H:%M")
-    df["search_keyword"] = search_keyword
+    # Sort by price (ascending - cheapest first) and add helpful columns
+    df = df.sort_values(by="numeric_price", ascending=True).assign(
+        price_formatted=lambda d: "€" + d["numeric_price"].map("{:,.2f}".format),
+        scraped_date=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        search_keyword=search_keyword
+    )
     
     # Reorder columns for better readability
     column_order = ["title", "price_formatted", "numeric_price", "location", "url", "search_keyword", "scraped_date"]
@@ -161,12 +199,29 @@ def clean_listings(data, search_keyword, output_filename=None):
     other_columns = [col for col in df.columns if col not in column_order]
     df = df[existing_columns + other_columns]
     
-    # Save to Excel if filename provided
+    # Save to Excel if filename provided, plus a Parquet copy for programmatic reuse
     if output_filename:
         save_to_excel(df, output_filename, search_keyword)
+        save_to_parquet(df, output_filename)
     
     return df
 
+# Above this many rows, skip hyperlink detection on every string cell (the slowest part of the write)
+LARGE_EXCEL_ROWS = 5000
+EXCEL_CHUNK_ROWS = 10000
+
+def _excel_rows(df):
+    """Yield rows of plain Python values with NaN as None, converting a chunk of columns at a time"""
+    for start in range(0, len(df), EXCEL_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXCEL_CHUNK_ROWS]
+        columns = []
+        for col in chunk.columns:
+            values = chunk[col]
+            if values.hasnans:
+                values = values.astype(object).where(values.notna(), None)
+            columns.append(values.tolist())
+        yield from zip(*columns)
+
 def save_to_excel(df, output_filename, search_keyword=None):
     """Save DataFrame to a formatted Excel file"""
     # Ensure sheets directory exists
@@ -178,10 +233,27 @@ def save_to_excel(df, output_filename, search_keyword=None):
     
     output_path = os.path.join("sheets", output_filename)
     
-    # Save to Excel
+    # Save to Excel, streaming rows to disk instead of holding the whole sheet in memory
+    sheet_name = 'Cleaned Listings'
     try:
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Cleaned Listings', index=False)
+        options = {'constant_memory': True, 'strings_to_urls': len(df) <= LARGE_EXCEL_ROWS}
+        with xlsxwriter.Workbook(output_path, options) as workbook:
+            worksheet = workbook.add_worksheet(sheet_name)
+            header_format = workbook.add_format({'bold': True, 'bg_color': '#D9E1F2', 'border': 1})
+            money_format = workbook.add_format({'num_format': '€#,##0.00'})
+            
+            # Constant memory mode can only write rows top to bottom, so the header goes first
+            # and the data is written row by row (pandas' to_excel writes column by column)
+            for i, col in enumerate(df.columns):
+                worksheet.write(0, i, col, header_format)
+                # Size columns from a sample rather than converting every row to a string
+                sample_lengths = df[col].head(200).astype(str).str.len()
+                width = max(len(str(col)), int(sample_lengths.max()) if len(sample_lengths) else 0)
+                worksheet.set_column(i, i, min(width + 2, 60), money_format if col == 'numeric_price' else None)
+            worksheet.freeze_panes(1, 0)
+            
+            for row_num, row in enumerate(_excel_rows(df), start=1):
+                worksheet.write_row(row_num, 0, row)
         print(f"✅ Saved {len(df)} cleaned listings to {output_filename}")
     except Exception as e:
         # Fallback to basic save
@@ -195,6 +267,17 @@ def save_to_excel(df, output_filename, search_keyword=None):
         print(f"📊 Average price: €{df['numeric_price'].mean():.2f}")
         print(f"📋 Cheapest item: {df.iloc[0]['title']} - €{df.iloc[0]['numeric_price']:.2f}")
 
+def save_to_parquet(df, output_filename):
+    """Save DataFrame as compressed Parquet next to the Excel output"""
+    os.makedirs("sheets", exist_ok=True)
+    
+    # Swap any .xlsx extension for .parquet
+    output_filename = os.path.splitext(output_filename)[0] + '.parquet'
+    output_path = os.path.join("sheets", output_filename)
+    
+    df.to_parquet(output_path, index=False, compression='zstd')
+    print(f"✅ Saved {len(df)} cleaned listings to {output_filename}")
+
 # Convenience function for command line usage
 def clean_from_file(filepath, search_keyword, output_filename=None):
     """Clean listings from a file"""
@@ -1,20 +1,179 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.utils import free_port, is_connectable
 from webdriver_manager.chrome import ChromeDriverManager
+import json
+import os
+import signal
+import subprocess
+import time
 
-def setup_driver():
+SESSION_FILE = ".seleniumSessionId.json"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36"
+
+# Headers for plain HTTP requests so they look like the same browser
+BROWSER_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IE,en;q=0.9"
+}
+
+def build_chrome_options(headless=True):
     chrome_options = Options()
-    # chrome_options.add_argument('--headless')
+    if headless:
+        chrome_options.add_argument('--headless=new')
     chrome_options.add_argument('--disable-logging')  # Suppress extra logs
     chrome_options.add_argument('--disable-software-rasterizer')
     chrome_options.add_argument('--log-level=3')  
     chrome_options.add_argument('--disable-gpu')
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36')
+    chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+
+    # The scrapers only read text, so skip background work, extensions, audio and images
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-background-timer-throttling')
+    chrome_options.add_argument('--disable-backgrounding-occluded-windows')
+    chrome_options.add_argument('--disable-breakpad')
+    chrome_options.add_argument('--disable-ipc-flooding-protection')
+    chrome_options.add_argument('--disable-renderer-backgrounding')
+    chrome_options.add_argument('--mute-audio')
+    chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+    chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    # Hand the page back once the DOM is parsed; the scrapers wait for the elements they need themselves
+    chrome_options.page_load_strategy = 'eager'
+    return chrome_options
+
+def setup_driver(headless=True):
+    chrome_options = build_chrome_options(headless)
 
     # Automatically gets the correct version of ChromeDriver
     service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    # Reuse one HTTP connection to chromedriver for every command instead of reconnecting each time
+    driver = webdriver.Chrome(service=service, options=chrome_options, keep_alive=True)
+    # Explicit WebDriverWaits only; an implicit wait would stack on top of them
+    driver.implicitly_wait(0)
     return driver
+
+class PersistentWebdriver(webdriver.Remote):
+    """Remote driver that can attach to a session left running by a previous run"""
+
+    def __init__(self, command_executor, session_id=None, options=None):
+        self._attach_session_id = session_id
+        super().__init__(command_executor=command_executor, options=options or build_chrome_options(), keep_alive=True)
+
+    def start_session(self, capabilities):
+        # Attach to the existing browser instead of asking chromedriver for a new one
+        if self._attach_session_id:
+            self.session_id = self._attach_session_id
+            self.caps = {}
+            return
+        super().start_session(capabilities)
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        """Run a Chrome DevTools Protocol command, like webdriver.Chrome does"""
+        # Remote has no CDP method in older Selenium, and newer ones read caps, which are empty after attaching
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+def _start_detached_chromedriver():
+    """Start chromedriver in its own process group so the browser outlives this run
+
+    Returns the chromedriver URL and process id.
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [ChromeDriverManager().install(), f"--port={port}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    for _ in range(100):
+        if is_connectable(port):
+            return f"http://localhost:{port}", process.pid
+        time.sleep(0.1)
+    _stop_chromedriver(process.pid)
+    raise RuntimeError(f"chromedriver did not start on port {port}")
+
+def _stop_chromedriver(pid):
+    """Kill a detached chromedriver and the browser it started"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(pid, signal.SIGTERM)  # Its own process group, so Chrome goes with it
+        else:
+            os.kill(pid, signal.SIGTERM)
+    except OSError:
+        pass  # Already gone
+
+def _load_saved_session():
+    if not os.path.exists(SESSION_FILE):
+        return None
+    try:
+        with open(SESSION_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _discard_saved_session(saved):
+    """Stop the chromedriver a saved session belongs to and forget the session"""
+    port = saved.get("url", "").rsplit(":", 1)[-1]
+    # Only kill the pid while chromedriver still answers on its port, so a reused pid is left alone
+    if saved.get("pid") and port.isdigit() and is_connectable(int(port)):
+        _stop_chromedriver(saved["pid"])
+    if os.path.exists(SESSION_FILE):
+        os.remove(SESSION_FILE)
+
+def _attach_saved_session():
+    """Return a driver attached to the saved session, or None if it is gone"""
+    saved = _load_saved_session()
+    if saved is None:
+        return None
+    try:
+        driver = PersistentWebdriver(command_executor=saved["url"], session_id=saved["session_id"])
+        driver.current_url  # Raises if the browser or chromedriver has gone away
+        return driver
+    except Exception:
+        # The browser is gone, so don't leave its chromedriver running either
+        _discard_saved_session(saved)
+        return None
+
+def setup_persistent_driver():
+    """Reuse the browser left open by the last run, or start one that stays open after this run"""
+    driver = _attach_saved_session()
+    if driver is not None:
+        print("♻️ Reusing browser session from previous run")
+    else:
+        url, pid = _start_detached_chromedriver()
+        try:
+            driver = PersistentWebdriver(command_executor=url)
+        except Exception:
+            _stop_chromedriver(pid)
+            raise
+        with open(SESSION_FILE, "w") as f:
+            json.dump({"session_id": driver.session_id, "url": url, "pid": pid}, f)
+        print("🆕 Started new browser session")
+    # Same as setup_driver: explicit waits only
+    driver.implicitly_wait(0)
+    return driver
+
+def quit_persistent_driver(driver):
+    """Close a persistent browser for good, along with its chromedriver and saved session"""
+    session_id = driver.session_id
+    driver.quit()
+    saved = _load_saved_session()
+    if saved is not None and saved.get("session_id") == session_id:
+        _discard_saved_session(saved)
+
+def close_saved_browser():
+    """Shut down the browser a previous run left open, if any. Returns True if there was one"""
+    saved = _load_saved_session()
+    if saved is None:
+        return False
+    try:
+        driver = PersistentWebdriver(command_executor=saved["url"], session_id=saved["session_id"])
+        driver.quit()  # Let Chrome exit cleanly before its chromedriver is stopped
+    except Exception:
+        pass  # Already gone; stopping chromedriver below takes care of the rest
+    _discard_saved_session(saved)
+    return True
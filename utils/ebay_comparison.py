@@ -1,57 +1,218 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from urllib.parse import quote_plus
-import time
-import random
+from lxml import etree, html as lxml_html
+from utils.driver_setup import BROWSER_HEADERS
+from utils.page_cache import load_cached_json, save_json
+from utils.throttle import DomainRateLimiter
+import aiohttp
+import asyncio
+import threading
+import numpy as np
 import pandas as pd
 import os
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
 import re
 
+# Currency symbols, thousands separators and whitespace dropped before reading a price
+_PRICE_STRIP = str.maketrans('', '', '£$€, \t\n')
+_DIGITS = frozenset('0123456789')
+
+# Text fields of the first N non-sponsored result cards, read in the browser and returned in a single WebDriver call
+LISTING_FIELDS_JS = """
+const text = (card, selector) => {
+    const el = card.querySelector(selector);
+    return el ? el.innerText.trim() : null;
+};
+return Array.from(document.querySelectorAll('.s-item'))
+    .filter(card => !/sponsored/i.test(text(card, '.s-item__subtitle') || ''))
+    .slice(0, arguments[0])
+    .map(card => ({
+        title: text(card, '.s-item__title'),
+        price: text(card, '.s-item__price'),
+        date: text(card, '.s-item__title--tag'),
+        cond: text(card, '.SECONDARY_INFO')
+    }));
+"""
+
+def new_http_session():
+    """HTTP session for eBay requests that presents itself like the scraping browser"""
+    # Keep connections to each eBay host open so later searches skip the TCP/TLS handshake
+    connector = aiohttp.TCPConnector(limit=20, limit_per_host=10, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector, headers=BROWSER_HEADERS, timeout=aiohttp.ClientTimeout(total=20))
+
 class EbayScraper:
-    def __init__(self, driver):
-        self.driver = driver
+    _CURRENCY = {'co.uk': '£', 'com': '$', 'ie': '€'}  # Currency symbol for each eBay domain
+    
+    def __init__(self, driver=None, use_browser=False, use_cache=True):
+        # A driver, or a function returning one so Chrome only starts if eBay won't serve a page over plain HTTP
+        self._driver_source = driver
+        self.driver = None
+        self.use_browser = use_browser  # Skip plain HTTP and always search with the driver
+        self.use_cache = use_cache  # Read and write today's searches in the disk cache
         self.ebay_domains = ["co.uk", "com", "ie"]  # UK, US, Ireland
+        self._driver_lock = threading.Lock()
+        self.limiter = DomainRateLimiter()  # Spaces out requests to each eBay site separately
+        self._browsed_domains = set()  # Domains the driver has already loaded a search page from
         
     def scrape_sold_listings(self, search_term, max_results=15):
-        all_sold_items = []
+        """Search every eBay domain at once in a new HTTP session"""
+        return asyncio.run(self._scrape_sold_listings_new_session(search_term, max_results))
+    
+    async def _scrape_sold_listings_new_session(self, search_term, max_results):
+        async with new_http_session() as session:
+            return await self.scrape_sold_listings_async(session, search_term, max_results)
+    
+    async def scrape_sold_listings_async(self, session, search_term, max_results=15):
+        """Fetch all domains concurrently, using the browser only for domains that failed over HTTP"""
+        results = await asyncio.gather(*[
+            self._search_domain(session, search_term, domain, max_results) for domain in self.ebay_domains
+        ])
         
-        for domain in self.ebay_domains:
-            print(f"🔍 Searching eBay.{domain} sold listings for: {search_term}")
-            domain_results = self._scrape_domain(search_term, domain, max_results)
+        all_sold_items = []
+        for domain_results in results:
             all_sold_items.extend(domain_results)
             
-            # Small delay between domains to be respectful
-            time.sleep(random.uniform(1.5, 2.5))
-            
         return all_sold_items
     
-    def _scrape_domain(self, search_term, domain, max_results):
-        """Scrape sold listings from a specific eBay domain"""
+    async def _search_domain(self, session, search_term, domain, max_results):
+        """Sold listings for one domain, served from the disk cache when searched earlier today"""
+        cache_key = f"ebay|{search_term}|{domain}|{max_results}|{date.today()}"
+        cached_results = load_cached_json(cache_key) if self.use_cache else None
+        if cached_results is not None:
+            print(f"💾 Using cached eBay.{domain} results for: {search_term}")
+            return cached_results
+        
+        domain_results = None
+        if not self.use_browser:
+            domain_results = await self._scrape_domain_async(session, search_term, domain, max_results)
+        if domain_results is None and self._driver_source is not None:
+            domain_results = await asyncio.to_thread(self._scrape_domain_with_browser, search_term, domain, max_results)
+        
+        # Empty results aren't cached, since they can also mean the search failed
+        if domain_results and self.use_cache:
+            save_json(cache_key, domain_results)
+        return domain_results or []
+    
+    def _search_url(self, search_term, domain):
         # eBay sold listings URL with filters for completed/sold items
         encoded_term = quote_plus(search_term)
-        url = f"https://www.ebay.{domain}/sch/i.html?_nkw={encoded_term}&_sacat=0&LH_Sold=1&LH_Complete=1&_sop=13"
+        return f"https://www.ebay.{domain}/sch/i.html?_nkw={encoded_term}&_sacat=0&LH_Sold=1&LH_Complete=1&_sop=13"
+    
+    async def _scrape_domain_async(self, session, search_term, domain, max_results):
+        """Scrape sold listings from one eBay domain over plain HTTP, or return None if that didn't work"""
+        print(f"🔍 Searching eBay.{domain} sold listings for: {search_term}")
+        url = self._search_url(search_term, domain)
         
+        await self.limiter.acquire_async(f"ebay.{domain}")
         try:
-            self.driver.get(url)
-            # Wait for search results to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".srp-results"))
+            async with session.get(url) as response:
+                if response.status != 200:
+                    print(f"⚠️ HTTP {response.status} from eBay.{domain}")
+                    return None
+                page_html = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"⚠️ Error fetching eBay.{domain}: {e}")
+            return None
+        
+        try:
+            tree = lxml_html.fromstring(page_html)
+        except (ValueError, etree.ParserError):
+            # eBay answers some bot checks with an empty page; let the browser fallback try instead
+            print(f"⚠️ Empty or unreadable page from eBay.{domain}")
+            return None
+        # No results container usually means a bot check or a page that needs JavaScript
+        if not tree.cssselect(".srp-results"):
+            return None
+        
+        currency = self._get_currency_symbol(domain)
+        domain_results = []
+        for node in islice(self._organic_nodes(tree), max_results):
+            sold_item = self._extract_node_data(node, domain, currency)
+            if sold_item:
+                domain_results.append(sold_item)
+        
+        print(f"📊 Found {len(domain_results)} sold listings on eBay.{domain}")
+        return domain_results
+    
+    def _organic_nodes(self, tree):
+        """Result cards parsed with lxml, skipping promoted/sponsored listings"""
+        for node in tree.cssselect(".s-item"):
+            subtitle = node.cssselect(".s-item__subtitle")
+            if subtitle and 'sponsored' in subtitle[0].text_content().lower():
+                continue
+            yield node
+    
+    def _extract_node_data(self, node, domain, currency):
+        """Extract data from a single eBay listing parsed with lxml"""
+        def first_text(selector):
+            found = node.cssselect(selector)
+            return found[0].text_content().strip() if found else None
+        
+        return self._extract_listing_data({
+            'title': first_text(".s-item__title"),
+            'price': first_text(".s-item__price"),
+            'date': first_text(".s-item__title--tag"),
+            'cond': first_text(".SECONDARY_INFO")
+        }, domain, currency)
+    
+    def _extract_listing_data(self, fields, domain, currency):
+        """Build the sold item dict from a listing's raw text fields, or None to skip the listing"""
+        title = fields['title']
+        price_text = fields['price']
+        # Skip if title contains "New listing" or similar
+        if not title or price_text is None or "New listing" in title:
+            return None
+        
+        # Clean and convert price
+        cleaned_price = self._clean_price(price_text)
+        if cleaned_price is None:
+            return None
+        
+        return {
+            'title': title,
+            'price': cleaned_price,
+            'price_text': price_text,
+            'domain': domain,
+            'sale_date': fields['date'] or "Recently sold",
+            'condition': fields['cond'] or "Not specified",
+            'currency': currency
+        }
+    
+    def _scrape_domain_with_browser(self, search_term, domain, max_results):
+        # A single browser can't be driven from several threads at once
+        with self._driver_lock:
+            if self.driver is None:
+                self.driver = self._driver_source() if callable(self._driver_source) else self._driver_source
+                # Only explicit WebDriverWaits are used here, so make sure no implicit wait stacks on top of them
+                self.driver.implicitly_wait(0)
+            return self._scrape_domain(search_term, domain, max_results)
+    
+    def _scrape_domain(self, search_term, domain, max_results):
+        """Scrape sold listings from a specific eBay domain with the browser"""
+        url = self._search_url(search_term, domain)
+        
+        self.limiter.acquire(f"ebay.{domain}")
+        try:
+            self._navigate(url, domain)
+            # Wait only until the first result card renders rather than a fixed delay
+            WebDriverWait(self.driver, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ".s-item"))
             )
             
-            # Get all sold listings
-            listings = self.driver.find_elements(By.CSS_SELECTOR, ".s-item")
+            # Read every card's fields in one call instead of querying each field over WebDriver
+            listings = self.driver.execute_script(LISTING_FIELDS_JS, max_results)
+            currency = self._get_currency_symbol(domain)
             domain_results = []
             
-            for listing in listings[:max_results]:
-                try:
-                    sold_item = self._extract_listing_data(listing, domain)
-                    if sold_item:
-                        domain_results.append(sold_item)
-                except Exception as e:
-                    continue  # Skip problematic listings
+            for fields in listings:
+                sold_item = self._extract_listing_data(fields, domain, currency)
+                if sold_item:
+                    domain_results.append(sold_item)
                     
             print(f"📊 Found {len(domain_results)} sold listings on eBay.{domain}")
             return domain_results
@@ -63,95 +224,72 @@ class EbayScraper:
             print(f"⚠️ Error scraping eBay.{domain}: {str(e)}")
             return []
     
-    def _extract_listing_data(self, listing, domain):
-        """Extract data from a single eBay listing"""
-        try:
-            # Skip promoted/sponsored listings
-            if listing.find_elements(By.CSS_SELECTOR, ".s-item__subtitle"):
-                subtitle = listing.find_element(By.CSS_SELECTOR, ".s-item__subtitle").text
-                if "Sponsored" in subtitle or "SPONSORED" in subtitle:
-                    return None
-            
-            # Extract title
-            title_elem = listing.find_element(By.CSS_SELECTOR, ".s-item__title")
-            title = title_elem.text.strip()
-            
-            # Skip if title contains "New listing" or similar
-            if "New listing" in title or title == "":
-                return None
-                
-            # Extract price
-            price_elem = listing.find_element(By.CSS_SELECTOR, ".s-item__price")
-            price_text = price_elem.text.strip()
-            
-            # Clean and convert price
-            cleaned_price = self._clean_price(price_text)
-            if cleaned_price is None:
-                return None
-                
-            # Extract sale date if available
-            sale_date = self._extract_sale_date(listing)
-            
-            # Extract condition if available
-            condition = self._extract_condition(listing)
-            
-            return {
-                'title': title,
-                'price': cleaned_price,
-                'price_text': price_text,
-                'domain': domain,
-                'sale_date': sale_date,
-                'condition': condition,
-                'currency': self._get_currency_symbol(domain)
-            }
-            
-        except (NoSuchElementException, Exception):
-            return None
+    def _navigate(self, url, domain):
+        """Load a search page, reusing the open document for navigation once the domain has been visited"""
+        if domain not in self._browsed_domains:
+            self.driver.get(url)
+            self._browsed_domains.add(domain)
+            return
+        
+        # Navigating from script skips part of driver.get's pipeline; wait for the old page to go away
+        old_page = self.driver.find_element(By.TAG_NAME, "html")
+        self.driver.execute_script("window.stop(); location.href = arguments[0];", url)
+        WebDriverWait(self.driver, 5).until(EC.staleness_of(old_page))
     
     def _clean_price(self, price_text):
         """Extract numeric price from price text"""
-        try:
-            # Remove currency symbols and clean text
-            cleaned = re.sub(r'[£$€,\s]', '', price_text)
-            
-            # Handle price ranges (take the first price)
-            if 'to' in cleaned.lower():
-                cleaned = cleaned.split('to')[0]
-            
-            # Extract first number found
-            price_match = re.search(r'(\d+\.?\d*)', cleaned)
-            if price_match:
-                return float(price_match.group(1))
+        if not isinstance(price_text, str):
             return None
-            
-        except (ValueError, AttributeError):
+        
+        # Remove currency symbols and whitespace, and take the first price of a range
+        cleaned = price_text.translate(_PRICE_STRIP).lower().partition('to')[0]
+        
+        # Scan for the first number: a run of digits with at most one decimal point
+        start = 0
+        while start < len(cleaned) and cleaned[start] not in _DIGITS:
+            start += 1
+        end = start
+        seen_dot = False
+        while end < len(cleaned):
+            char = cleaned[end]
+            if char == '.' and not seen_dot:
+                seen_dot = True
+            elif char not in _DIGITS:
+                break
+            end += 1
+        
+        if end == start:
             return None
-    
-    def _extract_sale_date(self, listing):
-        """Extract sale date from listing if available"""
-        try:
-            date_elem = listing.find_element(By.CSS_SELECTOR, ".s-item__title--tag")
-            return date_elem.text.strip()
-        except NoSuchElementException:
-            return "Recently sold"
-    
-    def _extract_condition(self, listing):
-        """Extract item condition from listing if available"""
-        try:
-            condition_elem = listing.find_element(By.CSS_SELECTOR, ".SECONDARY_INFO")
-            return condition_elem.text.strip()
-        except NoSuchElementException:
-            return "Not specified"
+        return float(cleaned[start:end])
     
     def _get_currency_symbol(self, domain):
         """Get currency symbol based on eBay domain"""
-        currency_map = {
-            'co.uk': '£',
-            'com': '$',
-            'ie': '€'
-        }
-        return currency_map.get(domain, '$')
+        return self._CURRENCY.get(domain, '$')
 
+# Common noise words and phrases stripped from listing titles
+NOISE_WORDS = (
+    'excellent condition', 'good condition', 'fair condition', 'poor condition',
+    'brand new', 'new', 'used', 'refurbished', 'unlocked', 'locked',
+    'with box', 'boxed', 'unboxed', 'no box',
+    'charger included', 'original box', 'accessories',
+    'mint condition', 'like new', 'barely used',
+    'perfect condition', 'great condition', 'working',
+    'apple', 'genuine', 'original', 'official'
+)
+
+COLORS = ('black', 'white', 'red', 'blue', 'green', 'yellow', 'purple', 'pink', 'silver', 'gold', 'rose', 'space', 'gray', 'grey')
+
+def _word_alternation(words):
+    """One regex matching any of the words as whole words, longest phrases first"""
+    return re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)) + r')\b')
+
+_NOISE_RE = _word_alternation(NOISE_WORDS)
+_COLOR_RE = _word_alternation(COLORS)
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_WS_RE = re.compile(r'\s+')
+_IPHONE_RE = re.compile(r'iphone\s*(\d+\s*(?:pro|plus|max|mini)*)\s*(\d+gb)?')
+
+@lru_cache(maxsize=4096)
 def normalize_product_name(title):
     if not title:
         return ""
@@ -159,28 +297,17 @@ def normalize_product_name(title):
     # Convert to lowercase for consistent processing
     normalized = title.lower()
     
-    # Remove common noise words and phrases
-    noise_words = [
-        'excellent condition', 'good condition', 'fair condition', 'poor condition',
-        'brand new', 'new', 'used', 'refurbished', 'unlocked', 'locked',
-        'with box', 'boxed', 'unboxed', 'no box',
-        'charger included', 'original box', 'accessories',
-        'mint condition', 'like new', 'barely used',
-        'perfect condition', 'great condition', 'working',
-        'apple', 'genuine', 'original', 'official'
-    ]
-    
-    for noise in noise_words:
-        normalized = normalized.replace(noise, '')
+    # Remove common noise words and phrases in a single pass
+    normalized = _NOISE_RE.sub(' ', normalized)
     
     # Remove extra spaces and punctuation
-    normalized = re.sub(r'[^\w\s]', ' ', normalized)
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = _PUNCT_RE.sub(' ', normalized)
+    normalized = _WS_RE.sub(' ', normalized).strip()
     
     # Extract core product info for iPhones
     if 'iphone' in normalized:
         # Extract iPhone model and storage if present
-        iphone_match = re.search(r'iphone\s*(\d+\s*(?:pro|plus|max|mini)*)\s*(\d+gb)?', normalized)
+        iphone_match = _IPHONE_RE.search(normalized)
         if iphone_match:
             model = iphone_match.group(1).strip()
             storage = iphone_match.group(2) if iphone_match.group(2) else ''
@@ -188,23 +315,22 @@ def normalize_product_name(title):
     
     # Extract core product info for other items
     # Remove color names
-    colors = ['black', 'white', 'red', 'blue', 'green', 'yellow', 'purple', 'pink', 'silver', 'gold', 'rose', 'space', 'gray', 'grey']
-    for color in colors:
-        normalized = normalized.replace(color, '')
+    normalized = _COLOR_RE.sub(' ', normalized)
     
     # Clean up again
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = _WS_RE.sub(' ', normalized).strip()
     
     return normalized
 
 def group_similar_items(df):
 
-    # Add normalized product names
-    df['normalized_name'] = df['title'].apply(normalize_product_name)
+    # Add normalized product names, normalizing each distinct title only once
+    normalized_names = {title: normalize_product_name(title) for title in df['title'].unique()}
+    df['normalized_name'] = df['title'].map(normalized_names)
     
     # Group by normalized name instead of exact title
     grouped = df.groupby('normalized_name').agg({
-        'title': lambda x: x.iloc[0],  # Keep first title as representative
+        'title': 'first',  # Keep first title as representative
         'numeric_price': ['mean', 'min', 'max', 'count'],
         'location': 'first',
         'url': 'first'
@@ -221,128 +347,170 @@ def group_similar_items(df):
     
     return grouped
 
-def analyze_profit_opportunities(cleaned_listings_file, driver, output_file="profit_analysis.xlsx"):
+# Simple conversion rates to EUR (you might want to use real-time rates)
+CONVERSION_RATES = {'£': 1.15, '$': 0.85, '€': 1.0}
+
+def _analyze_item(item, sold_listings):
+    """Build the profit analysis row for one grouped DoneDeal item from its eBay sold listings"""
+    if not sold_listings:
+        print(f"⚠️ No eBay sold listings found for: {item['search_term']}")
+        return {
+            'item_title': item['representative_title'],
+            'search_term': item['search_term'],
+            'donedeal_avg_price': round(item['avg_donedeal_price'], 2),
+            'donedeal_min_price': round(item['min_donedeal_price'], 2),
+            'donedeal_max_price': round(item['max_donedeal_price'], 2),
+            'donedeal_listings': item['listing_count'],
+            'donedeal_location': item['location'],
+            'donedeal_url': item['url'],
+            'ebay_avg_price_eur': None,
+            'ebay_min_price_eur': None,
+            'ebay_max_price_eur': None,
+            'ebay_sold_count': 0,
+            'profit_potential_eur': None,
+            'profit_percentage': None,
+            'opportunity_level': "❌ NO DATA",
+            'analysis_date': datetime.now().strftime("%Y-%m-%d %H:%M")
+        }
+    
+    # Calculate eBay statistics in EUR (converted approximately), since the domains mix currencies
+    prices = np.fromiter((listing['price'] for listing in sold_listings), dtype=np.float64, count=len(sold_listings))
+    rates = np.fromiter((CONVERSION_RATES.get(listing['currency'], 1.0) for listing in sold_listings),
+                        dtype=np.float64, count=len(sold_listings))
+    eur_prices = prices * rates
+    
+    ebay_avg_eur = float(eur_prices.mean())
+    ebay_min_eur = float(eur_prices.min())
+    ebay_max_eur = float(eur_prices.max())
+    
+    # Calculate profit potential
+    profit_potential = ebay_avg_eur - item['avg_donedeal_price']
+    profit_percentage = (profit_potential / item['avg_donedeal_price']) * 100 if item['avg_donedeal_price'] > 0 else 0
+    
+    # Determine opportunity level
+    if profit_percentage >= 50:
+        opportunity = "🟢 EXCELLENT"
+    elif profit_percentage >= 25:
+        opportunity = "🟡 GOOD"
+    elif profit_percentage >= 10:
+        opportunity = "🟠 MODERATE"
+    else:
+        opportunity = "🔴 LOW"
+    
+    result = {
+        'item_title': item['representative_title'],
+        'search_term': item['search_term'],
+        'donedeal_avg_price': round(item['avg_donedeal_price'], 2),
+        'donedeal_min_price': round(item['min_donedeal_price'], 2),
+        'donedeal_max_price': round(item['max_donedeal_price'], 2),
+        'donedeal_listings': item['listing_count'],
+        'donedeal_location': item['location'],
+        'donedeal_url': item['url'],
+        'ebay_avg_price_eur': round(ebay_avg_eur, 2),
+        'ebay_min_price_eur': round(ebay_min_eur, 2),
+        'ebay_max_price_eur': round(ebay_max_eur, 2),
+        'ebay_sold_count': len(sold_listings),
+        'profit_potential_eur': round(profit_potential, 2),
+        'profit_percentage': round(profit_percentage, 1),
+        'opportunity_level': opportunity,
+        'analysis_date': datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+    
+    print(f"💰 {item['search_term']}: profit potential €{profit_potential:.2f} ({profit_percentage:.1f}%) - {opportunity}")
+    return result
+
+# Columns of the results sheet, in order
+RESULT_COLUMNS = [
+    'item_title', 'search_term', 'donedeal_avg_price', 'donedeal_min_price', 'donedeal_max_price',
+    'donedeal_listings', 'donedeal_location', 'donedeal_url', 'ebay_avg_price_eur', 'ebay_min_price_eur',
+    'ebay_max_price_eur', 'ebay_sold_count', 'profit_potential_eur', 'profit_percentage',
+    'opportunity_level', 'analysis_date'
+]
+
+# Numeric result columns, typed up front so rows without eBay data don't leave them as object columns
+RESULT_DTYPES = {
+    'donedeal_listings': 'int32',
+    'ebay_sold_count': 'int32',
+    'ebay_avg_price_eur': 'float64',
+    'ebay_min_price_eur': 'float64',
+    'ebay_max_price_eur': 'float64',
+    'profit_potential_eur': 'float64',
+    'profit_percentage': 'float64'
+}
+
+async def _analyze_items(ebay_scraper, unique_items, max_concurrent=5):
+    """Search eBay for several items at once over one shared HTTP session"""
+    semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def analyze_one(position, item):
+        async with semaphore:
+            print(f"\n🔍 [{position}/{len(unique_items)}] Analyzing: {item['representative_title'][:50]}...")
+            print(f"🔍 Searching eBay for: {item['search_term']}")
+            
+            # Get eBay sold listings for this item using the normalized search term
+            sold_listings = await ebay_scraper.scrape_sold_listings_async(session, item['search_term'], max_results=10)
+            return _analyze_item(item, sold_listings)
+    
+    async with new_http_session() as session:
+        results = await asyncio.gather(*[
+            analyze_one(position, item) for position, (_, item) in enumerate(unique_items.iterrows(), start=1)
+        ])
+    return results
+
+def analyze_profit_opportunities(cleaned_listings, driver, output_file="profit_analysis.xlsx", use_browser=False, use_cache=True):
+    """
+    Compare cleaned DoneDeal listings against eBay sold prices
+    
+    Args:
+        cleaned_listings: DataFrame returned by clean_listings, or filename of a cleaned file in sheets/
+        driver: Selenium driver, or a function returning one, only used when eBay won't serve a search over plain HTTP
+        output_file: Filename for the results in sheets/ (.xlsx, or .parquet for a compressed file)
+        use_browser: Search eBay with the driver instead of plain HTTP requests
+        use_cache: Reuse eBay searches cached earlier today, and cache new ones
+    
+    Returns:
+        Results DataFrame, or None if the listings couldn't be loaded
+    """
     print("🚀 Starting profit opportunity analysis...")
     
-    # Load cleaned listings
-    try:
-        listings_path = os.path.join("sheets", cleaned_listings_file)
-        df = pd.read_excel(listings_path)
-        print(f"📊 Loaded {len(df)} cleaned listings")
-    except Exception as e:
-        print(f"❌ Error loading cleaned listings: {e}")
-        return None
+    # Use the DataFrame directly when it's already in memory, otherwise load the file
+    if isinstance(cleaned_listings, pd.DataFrame):
+        df = cleaned_listings.copy()
+        print(f"📊 Processing {len(df)} cleaned listings")
+    else:
+        try:
+            listings_path = os.path.join("sheets", cleaned_listings)
+            if listings_path.endswith('.parquet'):
+                df = pd.read_parquet(listings_path)
+            else:
+                df = pd.read_excel(listings_path)
+            print(f"📊 Loaded {len(df)} cleaned listings")
+        except Exception as e:
+            print(f"❌ Error loading cleaned listings: {e}")
+            return None
     
     # Initialize eBay scraper
-    ebay_scraper = EbayScraper(driver)
+    ebay_scraper = EbayScraper(driver, use_browser=use_browser, use_cache=use_cache)
     
     # Group similar items together to avoid duplicate eBay searches
     unique_items = group_similar_items(df)
     
     print(f"🎯 Analyzing {len(unique_items)} unique products for profit opportunities")
     
-    analysis_results = []
-    
-    for idx, item in unique_items.iterrows():
-        print(f"\n🔍 [{idx+1}/{len(unique_items)}] Analyzing: {item['representative_title'][:50]}...")
-        print(f"🔍 Searching eBay for: {item['search_term']}")
-        
-        # Get eBay sold listings for this item using the normalized search term
-        sold_listings = ebay_scraper.scrape_sold_listings(item['search_term'], max_results=10)
-        
-        if sold_listings:
-            # Calculate eBay statistics
-            ebay_prices = [listing['price'] for listing in sold_listings]
-            ebay_avg = sum(ebay_prices) / len(ebay_prices)
-            ebay_min = min(ebay_prices)
-            ebay_max = max(ebay_prices)
-            
-            # Calculate profit metrics (convert eBay prices to EUR approximately)
-            # Simple conversion rates (you might want to use real-time rates)
-            conversion_rates = {'£': 1.15, '$': 0.85, '€': 1.0}  # to EUR
-            
-            # Convert eBay prices to EUR for comparison
-            eur_prices = []
-            for listing in sold_listings:
-                rate = conversion_rates.get(listing['currency'], 1.0)
-                eur_prices.append(listing['price'] * rate)
-            
-            if eur_prices:
-                ebay_avg_eur = sum(eur_prices) / len(eur_prices)
-                ebay_min_eur = min(eur_prices)
-                ebay_max_eur = max(eur_prices)
-                
-                # Calculate profit potential
-                profit_potential = ebay_avg_eur - item['avg_donedeal_price']
-                profit_percentage = (profit_potential / item['avg_donedeal_price']) * 100 if item['avg_donedeal_price'] > 0 else 0
-                
-                # Determine opportunity level
-                if profit_percentage >= 50:
-                    opportunity = "🟢 EXCELLENT"
-                elif profit_percentage >= 25:
-                    opportunity = "🟡 GOOD"
-                elif profit_percentage >= 10:
-                    opportunity = "🟠 MODERATE"
-                else:
-                    opportunity = "🔴 LOW"
-                
-                analysis_results.append({
-                    'item_title': item['representative_title'],
-                    'search_term': item['search_term'],
-                    'donedeal_avg_price': round(item['avg_donedeal_price'], 2),
-                    'donedeal_min_price': round(item['min_donedeal_price'], 2),
-                    'donedeal_max_price': round(item['max_donedeal_price'], 2),
-                    'donedeal_listings': item['listing_count'],
-                    'donedeal_location': item['location'],
-                    'donedeal_url': item['url'],
-                    'ebay_avg_price_eur': round(ebay_avg_eur, 2),
-                    'ebay_min_price_eur': round(ebay_min_eur, 2),
-                    'ebay_max_price_eur': round(ebay_max_eur, 2),
-                    'ebay_sold_count': len(sold_listings),
-                    'profit_potential_eur': round(profit_potential, 2),
-                    'profit_percentage': round(profit_percentage, 1),
-                    'opportunity_level': opportunity,
-                    'analysis_date': datetime.now().strftime("%Y-%m-%d %H:%M")
-                })
-                
-                print(f"💰 Profit potential: €{profit_potential:.2f} ({profit_percentage:.1f}%) - {opportunity}")
-            
-        else:
-            print("⚠️ No eBay sold listings found")
-            analysis_results.append({
-                'item_title': item['representative_title'],
-                'search_term': item['search_term'],
-                'donedeal_avg_price': round(item['avg_donedeal_price'], 2),
-                'donedeal_min_price': round(item['min_donedeal_price'], 2),
-                'donedeal_max_price': round(item['max_donedeal_price'], 2),
-                'donedeal_listings': item['listing_count'],
-                'donedeal_location': item['location'],
-                'donedeal_url': item['url'],
-                'ebay_avg_price_eur': None,
-                'ebay_min_price_eur': None,
-                'ebay_max_price_eur': None,
-                'ebay_sold_count': 0,
-                'profit_potential_eur': None,
-                'profit_percentage': None,
-                'opportunity_level': "❌ NO DATA",
-                'analysis_date': datetime.now().strftime("%Y-%m-%d %H:%M")
-            })
-        
-        # Small delay between searches to be respectful
-        time.sleep(random.uniform(2, 4))
+    analysis_results = asyncio.run(_analyze_items(ebay_scraper, unique_items))
     
-    # Create results DataFrame and save
-    results_df = pd.DataFrame(analysis_results)
+    # Create results DataFrame and save (columns are named up front so an empty result still has them)
+    results_df = pd.DataFrame(analysis_results, columns=RESULT_COLUMNS).astype(RESULT_DTYPES)
     
-    # Sort by profit percentage (best opportunities first)
-    # Handle NaN values by filling them with -999 for sorting, then restore them
-    results_df['profit_percentage_temp'] = results_df['profit_percentage'].fillna(-999)
-    results_df = results_df.sort_values('profit_percentage_temp', ascending=False)
-    results_df = results_df.drop('profit_percentage_temp', axis=1)
+    # Sort by profit percentage (best opportunities first, items without eBay data last)
+    results_df = results_df.sort_values('profit_percentage', ascending=False, na_position='last')
     
-    # Save to Excel with formatting
+    # Save as Parquet when asked for, otherwise to Excel with the faster xlsxwriter engine
     output_path = os.path.join("sheets", output_file)
-    results_df.to_excel(output_path, index=False)
+    if output_file.endswith('.parquet'):
+        results_df.to_parquet(output_path, index=False, compression='zstd')
+    else:
+        results_df.to_excel(output_path, index=False, engine='xlsxwriter')
     
     # Print summary
     profitable_items = results_df[results_df['profit_percentage'].notna() & (results_df['profit_percentage'] > 10)]
@@ -0,0 +1,47 @@
+import hashlib
+import json
+import os
+import time
+
+CACHE_DIR = "cache"
+CACHE_TTL = 6 * 60 * 60  # Seconds before a cached page is fetched again
+
+def _cache_path(key, extension="html"):
+    return os.path.join(CACHE_DIR, f"{hashlib.sha1(key.encode()).hexdigest()}.{extension}")
+
+def _is_fresh(path, ttl):
+    return time.time() - os.path.getmtime(path) <= ttl
+
+def load_cached_page(url, ttl=CACHE_TTL):
+    """Return the cached HTML for a URL, or None if it is missing or older than ttl seconds"""
+    path = _cache_path(url)
+    try:
+        if not _is_fresh(path, ttl):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def save_page(url, page_html):
+    """Store a page's HTML so reruns can skip fetching it"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_path(url), "w", encoding="utf-8") as f:
+        f.write(page_html)
+
+def load_cached_json(key, ttl=CACHE_TTL):
+    """Return data saved under key with save_json, or None if it is missing or older than ttl seconds"""
+    path = _cache_path(key, "json")
+    try:
+        if not _is_fresh(path, ttl):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_json(key, data):
+    """Store JSON-serializable results (e.g. parsed listings) under key"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_path(key, "json"), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
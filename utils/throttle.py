@@ -0,0 +1,66 @@
+from collections import deque
+import asyncio
+import threading
+import time
+
+class Throttle:
+    """Spaces out requests to one site, adapting the gap to how fast it is responding"""
+
+    def __init__(self, min_delay=0.5, max_delay=5.0, backoff=1.0, smoothing=0.3):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff = backoff  # Delay as a multiple of the average response time
+        self.smoothing = smoothing  # Weight of the newest response in the moving average
+        self.delay = min_delay
+        self.avg_response_time = None
+        self.last_response_time = None
+
+    def wait(self):
+        """Sleep only for whatever is left of the delay since the last response came back"""
+        if self.last_response_time is None:
+            return
+        remaining = self.delay - (time.monotonic() - self.last_response_time)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def record(self, response_time):
+        """Fold a finished request's duration into the average and recompute the delay"""
+        if self.avg_response_time is None:
+            self.avg_response_time = response_time
+        else:
+            self.avg_response_time = self.smoothing * response_time + (1 - self.smoothing) * self.avg_response_time
+        # Slow responses mean a busy server, so back off; fast ones let us go quicker
+        self.delay = min(self.max_delay, max(self.min_delay, self.avg_response_time * self.backoff))
+        self.last_response_time = time.monotonic()
+
+class DomainRateLimiter:
+    """Allows at most `rate` requests per `interval` seconds to each domain, without holding up other domains"""
+
+    def __init__(self, rate=1, interval=1.5):
+        self.rate = rate
+        self.interval = interval
+        self._windows = {}  # Domain -> start times of its recent (and already booked) requests
+        self._lock = threading.Lock()
+
+    def reserve(self, domain):
+        """Book the next free slot for a domain and return how many seconds until it starts"""
+        with self._lock:
+            now = time.monotonic()
+            window = self._windows.setdefault(domain, deque())
+            while window and window[0] <= now - self.interval:
+                window.popleft()
+            start = now if len(window) < self.rate else window[-self.rate] + self.interval
+            window.append(start)
+            return start - now
+
+    def acquire(self, domain):
+        """Block until a request to the domain is allowed"""
+        delay = self.reserve(domain)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, domain):
+        """Wait without blocking the event loop until a request to the domain is allowed"""
+        delay = self.reserve(domain)
+        if delay > 0:
+            await asyncio.sleep(delay)